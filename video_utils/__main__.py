@@ -1,5 +1,6 @@
 import itertools
 import os
+import time
 import cv2
 
 from video_utils.frame_drawer import FrameDrawer
@@ -19,6 +20,7 @@ recording_dir = os.environ.get('RECORDING_DIR', None)
 reconnect_threshold_sec = int(os.environ.get('RECONNECT_THRESHOLD_SEC', 5))
 max_height = int(os.environ.get('MAX_HEIGHT', 1080))
 method = os.environ.get('METHOD', 'cv2')
+mjpeg_port = int(os.environ.get('MJPEG_PORT', 8080))
 
 '''
 Sample code on usage for concurrent streams
@@ -54,6 +56,71 @@ def one_video_manager_to_many_source():
     vidManager.stop()
 
 
+def one_video_manager_to_mosaic():
+    frame_drawer = FrameDrawer()
+    from video_utils.video_manager import VideoManager
+    from video_utils.mosaic import Mosaic
+
+    vidManager = VideoManager(video_feed_names=video_feed_names.split(','),
+                              streams=streams.split(','), source_types=source_types.split(','),
+                              manual_video_fps=manual_video_fps.split(','), queue_size=queue_size,
+                              recording_dir=recording_dir,
+                              reconnect_threshold_sec=reconnect_threshold_sec, max_height=max_height, method=method)
+    mosaic = Mosaic(vidManager, cell_size=(480, 270), update_interval_sec=0)
+
+    vidManager.start()
+    print(f'{vidManager.get_all_videos_information()}')
+
+    for frame_count in itertools.count():
+        frame_of_each_video_feed = vidManager.read()  # frames is list of arrays from 0 - 255, dtype uint8
+        for i in range(len(frame_of_each_video_feed)):
+            if len(frame_of_each_video_feed[i]) != 0:
+                frame_of_each_video_feed[i] = frame_drawer.draw_detections(frame_of_each_video_feed[i],
+                                                                           [('test0', 0, (80, 80, 100, 60)),
+                                                                            ('test1', 0, (100, 100, 120, 80))])
+        mosaic.update(frame_of_each_video_feed)
+        mosaic.show()
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            cv2.destroyAllWindows()
+            break
+
+    vidManager.stop()
+
+
+def one_video_manager_to_mjpeg_server():
+    frame_drawer = FrameDrawer()
+    from video_utils.video_manager import VideoManager
+    from video_utils.mjpeg_server import MJPEGServer
+
+    vidManager = VideoManager(video_feed_names=video_feed_names.split(','),
+                              streams=streams.split(','), source_types=source_types.split(','),
+                              manual_video_fps=manual_video_fps.split(','), queue_size=queue_size,
+                              recording_dir=recording_dir,
+                              reconnect_threshold_sec=reconnect_threshold_sec, max_height=max_height, method=method)
+    server = MJPEGServer(port=mjpeg_port, jpeg_quality=80, max_fps=15).register(vidManager)
+
+    vidManager.start()
+    server.start()
+    print(f'{vidManager.get_all_videos_information()}')
+    print(f'Serving feeds on http://localhost:{mjpeg_port}/')
+
+    try:
+        for frame_count in itertools.count():
+            frame_of_each_video_feed = vidManager.read()  # frames is list of arrays from 0 - 255, dtype uint8
+            for i, video_stream_information in enumerate(vidManager.videos):
+                if len(frame_of_each_video_feed[i]) != 0:
+                    drawn_frame = frame_drawer.draw_detections(frame_of_each_video_feed[i],
+                                                               [('test0', 0, (80, 80, 100, 60)),
+                                                                ('test1', 0, (100, 100, 120, 80))])
+                    server.publish(video_stream_information['video_feed_name'], drawn_frame)
+            time.sleep(0.01)
+    except KeyboardInterrupt:
+        pass
+
+    server.stop()
+    vidManager.stop()
+
+
 def one_video_manager_to_one_source():
     frame_drawer = FrameDrawer()
     from video_utils.video_manager_single_feed_multiple_sources import VideoManager
@@ -86,4 +153,6 @@ def one_video_manager_to_one_source():
 
 if __name__ == '__main__':
     one_video_manager_to_many_source()
+    # one_video_manager_to_mosaic()
+    # one_video_manager_to_mjpeg_server()
     # one_video_manager_to_one_source()
@@ -0,0 +1,204 @@
+import html
+import logging
+import socket
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Condition, Lock, Thread
+from urllib.parse import quote, unquote
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BOUNDARY = 'mjpegframe'
+
+
+class _Feed:
+    def __init__(self):
+        self.jpeg = None
+        self.seq = 0
+        self.last_encoded = 0.
+        self.cond = Condition()
+        self.tile_buffer = None  # reused to lay out ROI batches side by side
+
+
+class MJPEGServer:
+    """
+    Class that re-streams frames as MJPEG over HTTP. Each published frame is JPEG-encoded once and the same bytes are
+    broadcast to every client of that feed, clients that fall behind only ever get the latest frame.
+    """
+
+    def __init__(self, host='0.0.0.0', port=8080, jpeg_quality=80, max_fps=None, client_timeout_sec=30,
+                 video_feed_names=None):
+        """
+        Args:
+            host (str): Interface to bind to
+            port (int): Port to bind to
+            jpeg_quality (int): JPEG quality from 0 - 100
+            max_fps (float or None): Max no. of frames encoded per second per feed, frames published faster than this are dropped. None for no limit
+            client_timeout_sec (float): Seconds a client waits for a new frame, or a send to a client may block, before the connection is closed
+            video_feed_names (list): Feed names to serve before their first frame is published, so that clients connecting early wait instead of getting a 404 (see also `register()`)
+        """
+        self.host = host
+        self.port = port
+        self.encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), int(jpeg_quality)]
+        self.min_interval_sec = 1 / max_fps if max_fps else 0
+        self.client_timeout_sec = client_timeout_sec
+        self.feeds = {}
+        self.feeds_lock = Lock()
+        self.httpd = None
+        self.stopped = True
+        for feed_name in video_feed_names or []:
+            self._get_feed(feed_name)
+
+    def _get_feed(self, feed_name):
+        feed = self.feeds.get(feed_name)
+        if feed is None:
+            with self.feeds_lock:
+                feed = self.feeds.setdefault(feed_name, _Feed())
+        return feed
+
+    def feed_names(self):
+        with self.feeds_lock:
+            return sorted(self.feeds)
+
+    def register(self, video_manager):
+        """
+        Serves all feeds of a VideoManager from now on, clients of a feed that has not published yet wait for its first frame.
+
+        Args:
+            video_manager (VideoManager): VideoManager whose feed names are registered
+        """
+        for vid in video_manager.videos:
+            self._get_feed(vid['video_feed_name'])
+        return self
+
+    def publish(self, feed_name, frame):
+        """
+        Args:
+            feed_name (str): Name of feed, served at http://<host>:<port>/<feed_name>
+            frame: BGR frame, e.g. from `VideoManager.read()` or `FrameDrawer.draw_detections()`. ROI batches are encoded side by side
+
+        Returns:
+            True if the frame was encoded and broadcast, False if it was dropped by the rate limit or failed to encode
+        """
+        if frame is None or len(frame) == 0:
+            return False
+        feed = self._get_feed(feed_name)
+        now = time.time()
+        if now - feed.last_encoded < self.min_interval_sec:
+            return False
+
+        if frame.ndim == 4:
+            frame = self._tile(feed, frame)
+        ok, buf = cv2.imencode('.jpg', frame, self.encode_params)
+        if not ok:
+            logger.warning('Failed to encode frame for {}'.format(feed_name))
+            return False
+
+        with feed.cond:
+            feed.jpeg = buf.tobytes()
+            feed.seq += 1
+            feed.last_encoded = now
+            feed.cond.notify_all()
+        return True
+
+    def _tile(self, feed, batch):
+        num_rois, height, width = batch.shape[:3]
+        shape = (height, num_rois * width) + batch.shape[3:]
+        if feed.tile_buffer is None or feed.tile_buffer.shape != shape or feed.tile_buffer.dtype != batch.dtype:
+            feed.tile_buffer = np.empty(shape, dtype=batch.dtype)
+        feed.tile_buffer.reshape((height, num_rois, width) + batch.shape[3:])[...] = batch.swapaxes(0, 1)
+        return feed.tile_buffer
+
+    def publish_frames(self, video_manager, frames):
+        """
+        Args:
+            video_manager (VideoManager): VideoManager the frames were read from, used for feed names
+            frames (list): One frame (or [] if no new frame) per feed, as returned by `VideoManager.read()`
+        """
+        for vid, frame in zip(video_manager.videos, frames):
+            self.publish(vid['video_feed_name'], frame)
+
+    def wait_for_frame(self, feed_name, last_seq, timeout=None):
+        """
+        Blocks until the feed has a frame newer than `last_seq`.
+
+        Returns:
+            (seq, jpeg bytes), or (last_seq, None) if timed out or server stopped
+        """
+        feed = self._get_feed(feed_name)
+        with feed.cond:
+            feed.cond.wait_for(lambda: feed.seq > last_seq or self.stopped, timeout=timeout)
+            if feed.seq > last_seq and not self.stopped:
+                return feed.seq, feed.jpeg
+        return last_seq, None
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            timeout = server.client_timeout_sec  # also drops clients that stop reading
+
+            def log_message(self, format, *args):
+                logger.debug('{} - {}'.format(self.address_string(), format % args))
+
+            def do_GET(self):
+                feed_name = unquote(self.path.split('?', 1)[0].strip('/'))
+                if not feed_name:
+                    body = ''.join(f'<li><a href="/{quote(name)}">{html.escape(name)}</a></li>' for name in server.feed_names())
+                    body = f'<html><body><ul>{body}</ul></body></html>'.encode()
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/html')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                if feed_name not in server.feeds:
+                    self.send_error(404, f'No such feed: {feed_name}')
+                    return
+
+                self.send_response(200)
+                self.send_header('Cache-Control', 'no-cache, private')
+                self.send_header('Pragma', 'no-cache')
+                self.send_header('Content-Type', f'multipart/x-mixed-replace; boundary={BOUNDARY}')
+                self.end_headers()
+
+                seq = 0
+                try:
+                    while not server.stopped:
+                        seq, jpeg = server.wait_for_frame(feed_name, seq, timeout=server.client_timeout_sec)
+                        if jpeg is None:
+                            break
+                        self.wfile.write(f'--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n'
+                                         f'Content-Length: {len(jpeg)}\r\n\r\n'.encode())
+                        self.wfile.write(jpeg)
+                        self.wfile.write(b'\r\n')
+                except (BrokenPipeError, ConnectionResetError, socket.timeout):
+                    pass
+                logger.debug('Client {} disconnected from {}'.format(self.address_string(), feed_name))
+
+        return Handler
+
+    def start(self):
+        if self.stopped:
+            self.stopped = False
+            self.httpd = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+            self.httpd.daemon_threads = True
+            t = Thread(target=self.httpd.serve_forever, args=(), daemon=True)
+            t.start()
+            logger.info('MJPEG server started on http://{}:{}'.format(self.host, self.port))
+        return self
+
+    def stop(self):
+        if not self.stopped:
+            self.stopped = True
+            with self.feeds_lock:
+                feeds = list(self.feeds.values())
+            for feed in feeds:
+                with feed.cond:
+                    feed.cond.notify_all()
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            logger.info('MJPEG server stopped')
@@ -0,0 +1,137 @@
+import math
+import time
+
+import cv2
+import numpy as np
+
+from video_utils.video_getter_cv2 import HEALTH_OK, HEALTH_FROZEN, HEALTH_CORRUPT, HEALTH_STOPPED
+
+LIVE = 'LIVE'
+STALE = 'STALE'
+STOPPED = HEALTH_STOPPED
+
+HEALTH_COLORS = {
+    LIVE: (0, 200, 0),
+    STALE: (0, 165, 255),
+    STOPPED: (0, 0, 255),
+    HEALTH_FROZEN: (255, 0, 255),
+    HEALTH_CORRUPT: (0, 0, 255),
+}
+
+
+class Mosaic:
+    def __init__(self, video_manager, cols=None, cell_size=(480, 270), update_interval_sec=0,
+                 stale_threshold_sec=5, draw_labels=True, font=cv2.FONT_HERSHEY_SIMPLEX, font_scale=0.5):
+        """Composites the feeds of a VideoManager into a single preallocated grid canvas, so that one frame can be
+        shown, recorded or streamed instead of one window per feed.
+
+        Args:
+            video_manager (VideoManager): VideoManager whose feeds are laid out, in the order of `video_manager.videos`
+            cols (int or None): No. of columns in the grid, None for a near-square grid
+            cell_size (tuple): (width, height) in px of each cell, frames are resized directly into their cell
+            update_interval_sec (float or list): Min seconds between redraws of a cell, either one value for all cells or a list with one value per feed. 0 to redraw on every new frame
+            stale_threshold_sec (float): Seconds without a new frame before a feed is labelled STALE. FROZEN and CORRUPT are taken from the stream's own health check
+            draw_labels (bool): Flag whether to overlay feed name and health on each cell
+            font: cv2 font used for labels
+            font_scale (float): Scale of label font
+        """
+        self.video_manager = video_manager
+        self.num_cells = len(video_manager.videos)
+        self.cols = int(cols) if cols else max(1, math.ceil(math.sqrt(self.num_cells)))
+        self.rows = max(1, math.ceil(self.num_cells / self.cols))
+        self.cell_width, self.cell_height = (int(x) for x in cell_size)
+
+        if isinstance(update_interval_sec, (list, tuple)):
+            assert len(update_interval_sec) == self.num_cells, 'update_interval_sec should have one value per feed'
+            self.update_interval_sec = [float(x) for x in update_interval_sec]
+        else:
+            self.update_interval_sec = [float(update_interval_sec)] * self.num_cells
+
+        self.stale_threshold_sec = stale_threshold_sec
+        self.draw_labels = draw_labels
+        self.font = font
+        self.font_scale = font_scale
+        self.font_thickness = 1
+        self.label_height = cv2.getTextSize('Ag', self.font, self.font_scale, self.font_thickness)[0][1] + 8
+
+        self.canvas = np.zeros((self.rows * self.cell_height, self.cols * self.cell_width, 3), dtype=np.uint8)
+        self.cells = []
+        for i in range(self.num_cells):
+            row, col = divmod(i, self.cols)
+            y = row * self.cell_height
+            x = col * self.cell_width
+            self.cells.append(self.canvas[y:y + self.cell_height, x:x + self.cell_width])
+
+        self.last_drawn = [0.] * self.num_cells
+        self.last_received = [None] * self.num_cells
+        self.health = [None] * self.num_cells  # None so that every cell is labelled on the first update()
+
+    def _feed_health(self, i, now):
+        stream = self.video_manager.videos[i]['stream']
+        if stream.stopped:
+            return STOPPED
+        stream_health = getattr(stream, 'health', HEALTH_OK)
+        if stream_health in (HEALTH_FROZEN, HEALTH_CORRUPT):
+            return stream_health
+        if self.last_received[i] is None or now - self.last_received[i] > self.stale_threshold_sec:
+            return STALE
+        return LIVE
+
+    def _resize_into(self, frame, dst):
+        if frame.ndim == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        out = cv2.resize(frame, (dst.shape[1], dst.shape[0]), dst=dst, interpolation=cv2.INTER_AREA)
+        if out is not dst:
+            dst[...] = out
+
+    def _draw_cell(self, i, frame):
+        cell = self.cells[i]
+        if frame.ndim == 4:  # ROI batch, each ROI resized into its own column of the cell
+            num_rois = len(frame)
+            for k in range(num_rois):
+                l = k * self.cell_width // num_rois
+                r = (k + 1) * self.cell_width // num_rois
+                if r > l:
+                    self._resize_into(frame[k], cell[:, l:r])
+        else:
+            self._resize_into(frame, cell)
+
+    def _draw_label(self, i):
+        cell = self.cells[i]
+        health = self.health[i]
+        text = f"{self.video_manager.videos[i]['video_feed_name']} [{health}]"
+        cv2.rectangle(cell, (0, 0), (self.cell_width - 1, self.label_height), (0, 0, 0), -1)
+        cv2.putText(cell, text, (4, self.label_height - 5), self.font, self.font_scale, HEALTH_COLORS[health],
+                    self.font_thickness, cv2.LINE_AA)
+
+    def update(self, frames):
+        """
+        Args:
+            frames (list): One frame (or [] if no new frame) per feed, as returned by `VideoManager.read()`. Frames may already be annotated, e.g. by FrameDrawer
+
+        Returns:
+            the composite canvas, which is reused across calls (copy it if it must outlive the next update)
+        """
+        now = time.time()
+        for i in range(self.num_cells):
+            frame = frames[i] if i < len(frames) else []
+            has_frame = len(frame) != 0
+            if has_frame:
+                self.last_received[i] = now
+
+            prev_health = self.health[i]
+            self.health[i] = self._feed_health(i, now)
+
+            if has_frame and now - self.last_drawn[i] >= self.update_interval_sec[i]:
+                self._draw_cell(i, frame)
+                self.last_drawn[i] = now
+            elif self.health[i] == prev_health:
+                continue
+
+            if self.draw_labels:
+                self._draw_label(i)
+
+        return self.canvas
+
+    def show(self, window_name='mosaic'):
+        cv2.imshow(window_name, self.canvas)
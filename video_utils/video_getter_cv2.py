@@ -6,9 +6,18 @@ from datetime import datetime
 from threading import Thread
 
 import cv2
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+HEALTH_OK = 'OK'
+HEALTH_FROZEN = 'FROZEN'  # identical frames for longer than frozen_threshold_sec
+HEALTH_CORRUPT = 'CORRUPT'  # uniform (grey/green/black) frames or frames ending in a flat fill band
+HEALTH_NO_SIGNAL = 'NO_SIGNAL'  # stream.read() not returning frames
+HEALTH_STOPPED = 'STOPPED'
+
+FINGERPRINT_SIZE = 32
+
 class VideoStream:
     """
     Class that continuously gets frames from a cv2 VideoCapture object
@@ -22,8 +31,25 @@ class VideoStream:
                  frame_crop=None,
                  rtsp_tcp=True,
                  max_cache=10,
+                 rois=None,
+                 output_size=None,
+                 health_check=True,
+                 frozen_threshold_sec=10,
+                 frozen_diff_threshold=0.1,
+                 blank_std_threshold=2.0,
+                 smear_rows_fraction=0.25,
+                 smear_diff_threshold=0.05,
+                 smear_edge_threshold=8.0,
+                 drop_unhealthy_frames=False,
+                 reconnect_on_unhealthy=False,
                  ):
+        # frame_crop (LTRB) is applied first and is what gets recorded. rois (list of LTRB, relative to the cropped
+        # frame) are then cut out and returned together as one contiguous (N, H, W, 3) batch. output_size (w, h)
+        # resizes each ROI, or the whole cropped frame if there are no rois.
         # rtsp_tcp argument does nothing here. only for vlc. 
+        # health_check computes a 32x32 grey fingerprint of every grabbed frame to flag frozen and corrupt frames
+        # (see update_health and is_smeared). reconnect_on_unhealthy reconnects once the feed has been unhealthy for
+        # reconnect_threshold_sec.
         self.video_stream_type = 'cv2'
         self.video_feed_name = video_feed_name # <cam name>
         self.source_type = source_type
@@ -54,7 +80,120 @@ class VideoStream:
             self.record_source_video = False
         if frame_crop is not None:
             assert len(frame_crop) == 4, 'Given FRAME CROP is invalid'
+            l, t, r, b = frame_crop
+            assert r > l and b > t and l >= 0 and t >= 0, 'Given FRAME CROP {} is invalid'.format(frame_crop)
         self.frame_crop = frame_crop
+        if rois is not None and len(rois) == 0:
+            rois = None
+        if rois is not None:
+            for roi in rois:
+                assert len(roi) == 4, 'Given ROI {} is invalid'.format(roi)
+                l, t, r, b = roi
+                assert r > l and b > t and l >= 0 and t >= 0, 'Given ROI {} is invalid'.format(roi)
+            if output_size is None:
+                roi_sizes = set((r - l, b - t) for l, t, r, b in rois)
+                assert len(roi_sizes) == 1, 'ROIs of different sizes need an output_size to be batched together'
+        if output_size is not None:
+            assert len(output_size) == 2, 'Given OUTPUT SIZE is invalid'
+            output_size = (int(output_size[0]), int(output_size[1]))
+        self.rois = rois
+        self.output_size = output_size
+
+        self.health_check = health_check
+        self.frozen_threshold_sec = frozen_threshold_sec
+        self.frozen_diff_threshold = frozen_diff_threshold
+        self.blank_std_threshold = blank_std_threshold
+        self.smear_rows_fraction = smear_rows_fraction
+        self.smear_diff_threshold = smear_diff_threshold
+        self.smear_edge_threshold = smear_edge_threshold
+        self.drop_unhealthy_frames = drop_unhealthy_frames
+        self.reconnect_on_unhealthy = reconnect_on_unhealthy
+        self.reset_health()
+
+    def reset_health(self):
+        self.health = HEALTH_NO_SIGNAL
+        self.fingerprint = None
+        self.frozen_fingerprint = None
+        self.frozen_since = None
+        self.unhealthy_since = None
+
+    def compute_fingerprint(self, frame):
+        # stride first so that the area resize only touches a fraction of the pixels. float so that sensor noise on
+        # a live but static scene is not rounded away
+        step = max(1, min(frame.shape[:2]) // (FINGERPRINT_SIZE * 4))
+        small = np.ascontiguousarray(frame[::step, ::step], dtype=np.float32)
+        small = cv2.resize(small, (FINGERPRINT_SIZE, FINGERPRINT_SIZE), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small
+
+    def update_health(self, frame):
+        """
+        Updates self.health from the fingerprint of a freshly grabbed (uncropped) frame.
+
+        Returns:
+            False if the frame should be dropped instead of queued
+        """
+        if not self.health_check:
+            self.health = HEALTH_OK
+            return True
+
+        now = time.time()
+        fingerprint = self.compute_fingerprint(frame)
+        self.fingerprint = fingerprint
+
+        # compare against the first frame of the current run rather than the previous frame, so that slow steady
+        # changes (e.g. dawn/dusk lighting) eventually break the run
+        if self.frozen_fingerprint is None or \
+                float(np.mean(np.abs(fingerprint - self.frozen_fingerprint))) >= self.frozen_diff_threshold:
+            self.frozen_fingerprint = fingerprint
+            self.frozen_since = now
+
+        if float(fingerprint.std()) < self.blank_std_threshold or self.is_smeared(fingerprint):
+            health = HEALTH_CORRUPT
+        elif now - self.frozen_since >= self.frozen_threshold_sec:
+            health = HEALTH_FROZEN
+        else:
+            health = HEALTH_OK
+
+        if health != self.health:
+            if health == HEALTH_OK:
+                if self.health in (HEALTH_FROZEN, HEALTH_CORRUPT):
+                    logger.info('Stream {} is healthy again'.format(self.video_feed_name))
+            else:
+                logger.warning('Stream {} is {}'.format(self.video_feed_name, health))
+        self.set_health(health)
+
+        return health == HEALTH_OK or not self.drop_unhealthy_frames
+
+    def is_smeared(self, fingerprint):
+        # a broken decode usually ends in a band of one flat fill colour that starts with a hard edge. Real content
+        # (floors, walls, gradients) keeps some noise or structure along the rows, or blends into the rows above
+        row_diffs = np.mean(np.abs(np.diff(fingerprint, axis=0)), axis=1)
+        band_rows = 1
+        for row_diff in row_diffs[::-1]:
+            if row_diff >= self.smear_diff_threshold:
+                break
+            band_rows += 1
+
+        if band_rows >= FINGERPRINT_SIZE or band_rows < self.smear_rows_fraction * FINGERPRINT_SIZE:
+            return False  # whole frame flat is left to blank_std_threshold
+        band = fingerprint[-band_rows:]
+        if float(band.std(axis=1).max()) >= self.smear_diff_threshold:
+            return False
+        return float(row_diffs[-band_rows]) >= self.smear_edge_threshold
+
+    def set_health(self, health):
+        # unhealthy_since only times FROZEN/CORRUPT, NO_SIGNAL is already handled by the pauseTime countdown
+        if health not in (HEALTH_FROZEN, HEALTH_CORRUPT):
+            self.unhealthy_since = None
+        elif self.unhealthy_since is None:
+            self.unhealthy_since = time.time()
+        self.health = health
+
+    def unhealthy_reconnect_due(self):
+        return self.reconnect_on_unhealthy and self.do_reconnect and self.health in (HEALTH_FROZEN, HEALTH_CORRUPT) \
+            and time.time() - self.unhealthy_since >= self.reconnect_threshold_sec
 
     def init_src(self):
         try:
@@ -67,29 +206,60 @@ class VideoStream:
             else:
                 self.fps = self.manual_video_fps
             # width and height returns 0 if stream not captured
+            src_width = int(self.stream.get(3))
+            src_height = int(self.stream.get(4))
             if self.frame_crop is None:
-                self.vid_width = int(self.stream.get(3))
-                self.vid_height = int(self.stream.get(4))
+                self.vid_width = src_width
+                self.vid_height = src_height
             else:
                 l, t, r, b = self.frame_crop
                 self.vid_width = r - l
                 self.vid_height = b - t
 
-            self.vidInfo = {'video_feed_name': self.video_feed_name, 'height': self.vid_height, 'width': self.vid_width,
+            # size of each frame (or of each ROI in the batch) returned by read()
+            if self.output_size is not None:
+                self.out_width, self.out_height = self.output_size
+            elif self.rois is not None:
+                l, t, r, b = self.rois[0]
+                self.out_width, self.out_height = r - l, b - t
+            else:
+                self.out_width, self.out_height = self.vid_width, self.vid_height
+
+            self.vidInfo = {'video_feed_name': self.video_feed_name, 'height': self.out_height, 'width': self.out_width,
+                            'num_rois': len(self.rois) if self.rois is not None else 0,
                             'manual_fps_inputted': self.manual_video_fps is not None,
                             'fps': self.fps, 'inited': False}
 
             self.out_vid = None
 
+            if src_width != 0:
+                self.check_crops(src_width, src_height)
+
             if self.vid_width != 0:
                 self.inited = True
                 self.vidInfo['inited'] = True
 
             self.__init_src_recorder()
 
+        except ValueError:
+            raise
         except Exception as error:
             logger.error('init stream {} error: {}'.format(self.video_feed_name, error))
 
+    def check_crops(self, src_width, src_height):
+        # out of bounds crops/ROIs would otherwise fail on every frame and look like a dropped stream
+        if self.frame_crop is not None:
+            l, t, r, b = self.frame_crop
+            if r > src_width or b > src_height:
+                raise ValueError('FRAME CROP {} of {} is outside of its {}x{} frame'.format(
+                    self.frame_crop, self.video_feed_name, src_width, src_height))
+        width, height = (self.vid_width, self.vid_height) if self.frame_crop is not None else (src_width, src_height)
+        for roi in self.rois or []:
+            l, t, r, b = roi
+            if r > width or b > height:
+                raise ValueError('ROI {} of {} is outside of its {}x{} (cropped) frame'.format(
+                    roi, self.video_feed_name, width, height))
+
     def __init_src_recorder(self):
         if self.record_source_video and self.inited:
             now = datetime.now()
@@ -116,6 +286,31 @@ class VideoStream:
         s.start()
         return self
 
+    def process_frame(self, frame):
+        """
+        Applies frame_crop, rois and output_size to a freshly grabbed frame.
+
+        Returns:
+            (cropped frame for recording, frame or ROI batch to be queued)
+        """
+        if self.frame_crop is not None:
+            l, t, r, b = self.frame_crop
+            frame = frame[t:b, l:r]
+
+        if self.rois is not None:
+            batch = np.empty((len(self.rois), self.out_height, self.out_width) + frame.shape[2:], dtype=frame.dtype)
+            for i, (l, t, r, b) in enumerate(self.rois):
+                if self.output_size is None:
+                    batch[i] = frame[t:b, l:r]
+                else:
+                    cv2.resize(frame[t:b, l:r], self.output_size, dst=batch[i], interpolation=cv2.INTER_AREA)
+            return frame, batch
+
+        if self.output_size is not None:
+            return frame, cv2.resize(frame, self.output_size, interpolation=cv2.INTER_AREA)
+
+        return frame, frame
+
     def get(self):
         while not self.stopped:
             try:
@@ -127,17 +322,23 @@ class VideoStream:
                 grabbed, frame = self.stream.read()
 
                 if grabbed:
-                    if self.frame_crop is not None:
-                        l, t, r, b = self.frame_crop
-                        frame = frame[t:b, l:r]
+                    keep_frame = self.update_health(frame)
+                    if self.unhealthy_reconnect_due():
+                        logger.warning('Stream {} has been {} for {}sec'.format(self.video_feed_name, self.health,
+                                                                                self.reconnect_threshold_sec))
+                        self.reconnect_start()
+                        break
+
+                    if keep_frame:
+                        frame, output = self.process_frame(frame)
 
-                    self.Q.appendleft(frame)
+                        self.Q.appendleft(output)
 
-                    if self.record_source_video:
-                        try:
-                            self.out_vid.write(frame)
-                        except Exception as e:
-                            pass
+                        if self.record_source_video:
+                            try:
+                                self.out_vid.write(frame)
+                            except Exception as e:
+                                pass
 
                     time.sleep(1 / self.fps)
 
@@ -146,6 +347,7 @@ class VideoStream:
                 grabbed = False
 
             if not grabbed:
+                self.set_health(HEALTH_NO_SIGNAL)
                 if self.pauseTime is None:
                     self.pauseTime = time.time()
                     self.printTime = time.time()
@@ -197,6 +399,7 @@ class VideoStream:
             if self.out_vid:
                 self.out_vid.release()
 
+            self.set_health(HEALTH_STOPPED)
             logger.info('Stopped video streaming for {}'.format(self.video_feed_name))
 
     def reconnect(self):
@@ -206,6 +409,7 @@ class VideoStream:
 
         if self.more():
             self.Q.clear()
+        self.reset_health()
 
         while not self.stream.isOpened():
             logger.debug(str(datetime.now()), 'Reconnecting to', self.video_feed_name)
@@ -214,7 +418,13 @@ class VideoStream:
             return ('error opening {}'.format(self.video_feed_name))
 
         if not self.inited:
-            self.init_src()
+            try:
+                self.init_src()
+            except ValueError as error:
+                # invalid frame crop/ROIs for this source, reconnecting will not fix that
+                logger.error('Stopping {}: {}'.format(self.video_feed_name, error))
+                self.stop()
+                return
 
         logger.info('VideoStream for {} initialised!'.format(self.video_feed_name))
         self.pauseTime = None
@@ -1,4 +1,5 @@
 from datetime import datetime
+import logging
 import os
 import time
 
@@ -7,6 +8,8 @@ import vlc
 
 from video_utils import video_getter_cv2
 
+logger = logging.getLogger(__name__)
+
 class VideoStream(video_getter_cv2.VideoStream):
     """
     Class that uses vlc instead of cv2 to continuously get frames with a dedicated thread as a workaround for artifacts.
@@ -18,6 +21,17 @@ class VideoStream(video_getter_cv2.VideoStream):
                  resize_fn=None,
                  frame_crop=None,
                  rtsp_tcp=True,
+                 rois=None,
+                 output_size=None,
+                 health_check=True,
+                 frozen_threshold_sec=10,
+                 frozen_diff_threshold=0.1,
+                 blank_std_threshold=2.0,
+                 smear_rows_fraction=0.25,
+                 smear_diff_threshold=0.05,
+                 smear_edge_threshold=8.0,
+                 drop_unhealthy_frames=False,
+                 reconnect_on_unhealthy=False,
                  ):
         video_getter_cv2.VideoStream.__init__(self, video_feed_name, source_type, src, manual_video_fps, 
                         queue_size=queue_size, 
@@ -27,6 +41,17 @@ class VideoStream(video_getter_cv2.VideoStream):
                         resize_fn=resize_fn,
                         frame_crop=frame_crop,
                         rtsp_tcp=rtsp_tcp,
+                        rois=rois,
+                        output_size=output_size,
+                        health_check=health_check,
+                        frozen_threshold_sec=frozen_threshold_sec,
+                        frozen_diff_threshold=frozen_diff_threshold,
+                        blank_std_threshold=blank_std_threshold,
+                        smear_rows_fraction=smear_rows_fraction,
+                        smear_diff_threshold=smear_diff_threshold,
+                        smear_edge_threshold=smear_edge_threshold,
+                        drop_unhealthy_frames=drop_unhealthy_frames,
+                        reconnect_on_unhealthy=reconnect_on_unhealthy,
                         )
 
         self.video_stream_type = 'vlc'
@@ -68,11 +93,17 @@ class VideoStream(video_getter_cv2.VideoStream):
 
                 if grabbed:
                     frame = cv2.imread(self.fixed_png_path)
-                    if self.frame_crop is not None:
-                        l,t,r,b = self.frame_crop
-                        frame = frame[t:b,l:r]
+                    keep_frame = self.update_health(frame)
+                    if self.unhealthy_reconnect_due():
+                        logger.warning('Stream {} has been {} for {}sec'.format(self.video_feed_name, self.health,
+                                                                                self.reconnect_threshold_sec))
+                        self.reconnect_start()
+                        break
 
-                    self.Q.appendleft(frame)
+                    if keep_frame:
+                        _, output = self.process_frame(frame)
+
+                        self.Q.appendleft(output)
 
                     time.sleep(1 / self.fps)
 
@@ -81,6 +112,7 @@ class VideoStream(video_getter_cv2.VideoStream):
                 grabbed = False
 
             if not grabbed:
+                self.set_health(video_getter_cv2.HEALTH_NO_SIGNAL)
                 if self.pauseTime is None:
                     self.pauseTime = time.time()
                     self.printTime = time.time()
@@ -121,12 +153,14 @@ class VideoStream(video_getter_cv2.VideoStream):
                 self.vlc_player.release()
                 self.vlc_instance.release()
 
+            self.set_health(video_getter_cv2.HEALTH_STOPPED)
             logger.info('Stopped video streaming for {}'.format(self.video_feed_name))
 
     def reconnect(self):
         logger.info(f'Reconnecting to {self.video_feed_name}...')
         if self.more():
             self.Q.clear()
+        self.reset_health()
 
         if self.vlc_player:
             self.vlc_player.stop()
@@ -137,7 +171,13 @@ class VideoStream(video_getter_cv2.VideoStream):
         self.vlc_player.set_mrl(self.src)
 
         if not self.inited:
-            self.init_src()
+            try:
+                self.init_src()
+            except ValueError as error:
+                # invalid frame crop/ROIs for this source, reconnecting will not fix that
+                logger.error('Stopping {}: {}'.format(self.video_feed_name, error))
+                self.stop()
+                return
 
         logger.info('VideoStream for {} initialised!'.format(self.video_feed_name))
         self.pauseTime = None
@@ -8,6 +8,18 @@ class VideoManager:
                  method='cv2',
                  frame_crop=None,
                  rtsp_tcp=True,
+                 frame_crops=None,
+                 rois=None,
+                 output_sizes=None,
+                 health_check=True,
+                 frozen_threshold_sec=10,
+                 frozen_diff_threshold=0.1,
+                 blank_std_threshold=2.0,
+                 smear_rows_fraction=0.25,
+                 smear_diff_threshold=0.05,
+                 smear_edge_threshold=8.0,
+                 drop_unhealthy_frames=False,
+                 reconnect_on_unhealthy=False,
                 ):
         """VideoManager that helps with multiple concurrent video streams
 
@@ -24,6 +36,18 @@ class VideoManager:
             method (str): 'cv2' or 'vlc', 'vlc' is slower but more robust to artifacting
             frame_crop (list): LTRB coordinates for frame cropping 
             rtsp_tcp (bool): Only for 'vlc' method. Default is True. If rtsp stream is UDP, then setting to False will remove "--rtsp-tcp" flag from vlc command. 
+            frame_crops (list): List of LTRB frame crops, one per stream (None to fall back to frame_crop)
+            rois (list): List of ROI lists, one per stream (None for no ROIs). Each ROI is LTRB relative to the cropped frame. A stream with ROIs returns all of them from read() as one (N, H, W, 3) array
+            output_sizes (list): List of (width, height), one per stream (None for no resizing). Resizes each ROI, or the whole cropped frame if the stream has no ROIs
+            health_check (bool): Flag whether to fingerprint every frame to detect frozen and corrupt feeds, see `get_all_health()`
+            frozen_threshold_sec (int): Seconds of identical frames before a feed is considered FROZEN
+            frozen_diff_threshold (float): Mean abs difference (0 - 255) between a 32x32 grey fingerprint and the first fingerprint of the current run below which frames count as identical
+            blank_std_threshold (float): Std dev (0 - 255) of the fingerprint below which a frame is considered uniform and CORRUPT. Lower it (or set to 0) for very dark scenes, e.g. night cameras
+            smear_rows_fraction (float): Min fraction of fingerprint rows that the flat fill band at the bottom of the frame must cover for the frame to be considered smeared and CORRUPT. Set above 1 to disable
+            smear_diff_threshold (float): Max mean abs difference (0 - 255) between adjacent fingerprint rows, and max std dev along a row, for rows to count as part of a flat fill band
+            smear_edge_threshold (float): Min mean abs difference (0 - 255) between the fill band and the row above it, so that smooth content blending into the bottom of the frame is not flagged
+            drop_unhealthy_frames (bool): Flag whether to drop FROZEN/CORRUPT frames instead of queueing them for read()
+            reconnect_on_unhealthy (bool): Flag whether to reconnect a feed that has been FROZEN/CORRUPT for reconnect_threshold_sec (requires do_reconnect)
         """
 
         # self.max_height = int(max_height)
@@ -32,6 +56,9 @@ class VideoManager:
 
         assert len(streams) == len(source_types) == len(
             video_feed_names), 'streams, source types and camNames should be the same length'
+        for per_stream_arg in (frame_crops, rois, output_sizes):
+            assert per_stream_arg is None or len(per_stream_arg) == len(
+                streams), 'frame_crops, rois and output_sizes should be the same length as streams'
         self.videos = []
 
         if (method == 'cv2'):
@@ -47,8 +74,19 @@ class VideoManager:
                                  queue_size=queue_size, recording_dir=recording_dir,
                                  reconnect_threshold_sec=int(reconnect_threshold_sec),
                                  do_reconnect=do_reconnect,
-                                 frame_crop=frame_crop,
+                                 frame_crop=frame_crops[i] if frame_crops is not None and frame_crops[i] is not None else frame_crop,
                                  rtsp_tcp=rtsp_tcp,
+                                 rois=rois[i] if rois is not None else None,
+                                 output_size=output_sizes[i] if output_sizes is not None else None,
+                                 health_check=health_check,
+                                 frozen_threshold_sec=frozen_threshold_sec,
+                                 frozen_diff_threshold=frozen_diff_threshold,
+                                 blank_std_threshold=blank_std_threshold,
+                                 smear_rows_fraction=smear_rows_fraction,
+                                 smear_diff_threshold=smear_diff_threshold,
+                                 smear_edge_threshold=smear_edge_threshold,
+                                 drop_unhealthy_frames=drop_unhealthy_frames,
+                                 reconnect_on_unhealthy=reconnect_on_unhealthy,
                                  )
 
             self.videos.append({'video_feed_name': video_feed_name, 'stream': stream})
@@ -57,13 +95,17 @@ class VideoManager:
     def from_list_file(cls, list_file, **kwargs):
         '''
         Args:
-        - list_file (str): Path to a txt file containing a list of camera info. Each row is <cam name>,<cam url>,<fps if applicable>. <cam url> is defined as "<source type>:<path>", where source type can be like "rtsp", "usb", "file" (see `cameras-example.list` for example)
+        - list_file (str): Path to a txt file containing a list of camera info. Each row is <cam name>,<cam url>,<fps if applicable>,<options if applicable>. <cam url> is defined as "<source type>:<path>", where source type can be like "rtsp", "usb", "file" (see `cameras-example.list` for example)
+        - options are optional per feed "key=value" fields in any order:
+            - crop=<l>:<t>:<r>:<b> frame crop
+            - roi=<l>:<t>:<r>:<b> ROI relative to the cropped frame, repeat for multiple ROIs
+            - size=<width>x<height> output size of each ROI, or of the cropped frame if there are no ROIs
 
         E.g.
         stream1,rtsp://192.168.1.39:554/stream
-        stream2,rtsp://192.168.1.40:554/live.sdp
+        stream2,rtsp://192.168.1.40:554/live.sdp,crop=0:120:1920:1080,size=960x480
         webcam1,usb:0
-        my_video_file,file:my_video_file.mp4,25
+        my_video_file,file:my_video_file.mp4,25,roi=0:0:640:360,roi=640:0:1280:360
 
 
         Note:
@@ -74,6 +116,9 @@ class VideoManager:
         streams = []
         source_types = []
         manual_video_fps = []
+        frame_crops = []
+        rois = []
+        output_sizes = []
         pure_files_only = True
         with open(list_file, 'r') as f:
             for l in f.readlines():
@@ -97,14 +142,37 @@ class VideoManager:
                     pure_files_only = False
                 streams.append(video_path)
 
-                if len(splits) == 3:
-                    fps = float(splits[2])
-                    # fps = int(splits[2])
-                else:
-                    fps = -1
+                fps = -1
+                frame_crop = None
+                feed_rois = []
+                output_size = None
+                for field in splits[2:]:
+                    field = field.strip()
+                    if '=' not in field:
+                        fps = float(field)
+                        # fps = int(field)
+                        continue
+                    key, value = field.split('=', 1)
+                    if key == 'crop':
+                        frame_crop = [int(x) for x in value.split(':')]
+                    elif key == 'roi':
+                        feed_rois.append([int(x) for x in value.split(':')])
+                    elif key == 'size':
+                        output_size = tuple(int(x) for x in value.lower().split('x'))
+                    else:
+                        raise ValueError(f'Unknown option {key} for {splits[0]}')
                 manual_video_fps.append(fps)
+                frame_crops.append(frame_crop)
+                rois.append(feed_rois or None)
+                output_sizes.append(output_size)
         if pure_files_only and 'queue_size' not in kwargs:
             kwargs['queue_size'] = None
+        if any(c is not None for c in frame_crops):
+            kwargs.setdefault('frame_crops', frame_crops)
+        if any(r is not None for r in rois):
+            kwargs.setdefault('rois', rois)
+        if any(s is not None for s in output_sizes):
+            kwargs.setdefault('output_sizes', output_sizes)
 
         return cls(video_feed_names, source_types, streams, manual_video_fps, **kwargs)
 
@@ -118,8 +186,18 @@ class VideoManager:
     def start(self):
         if self.stopped:
             # print('vid manager start')
+            # init (and so validate frame crops/ROIs of) every reachable stream before any capture thread is started
+            for vid in self.videos:
+                if not vid['stream'].inited:
+                    vid['stream'].init_src()
+
             for vid in self.videos:
-                vid['stream'].start()
+                try:
+                    vid['stream'].start()
+                except Exception:
+                    for started_vid in self.videos:
+                        started_vid['stream'].stop()
+                    raise
 
             self.stopped = False
 
@@ -150,6 +228,13 @@ class VideoManager:
             all_info.append(vid['stream'].vidInfo)
         return all_info
 
+    def get_all_health(self):
+        '''
+        Returns:
+            list of health state of each video feed: 'OK', 'FROZEN', 'CORRUPT', 'NO_SIGNAL' or 'STOPPED'
+        '''
+        return [vid['stream'].health for vid in self.videos]
+
     def read(self):
         frames = []
 